@@ -7,26 +7,36 @@ ClawHark Transcription Pipeline
 Usage:
     python3 transcribe.py 2026-02-28
     python3 transcribe.py 2026-02-28 --provider gemini
+    python3 transcribe.py 2026-02-28 --detector vad
 
 Phases:
-    1. Whisper  — local speech detection, filter silent chunks
+    1. Whisper  — local speech detection, filter silent chunks (or Silero VAD)
     2. Segment  — group chunks into conversations by time gaps
     3. Concat   — merge related chunks into conversation audio
-    4. Diarize  — speaker-separated transcription (AssemblyAI or Gemini)
+    4. Diarize  — speaker-separated transcription (AssemblyAI or Gemini),
+                  starting on each conversation as soon as Phase 3 has merged it
 
 Requirements:
     - ffmpeg + ffprobe
-    - whisper (pip install openai-whisper) OR faster-whisper
+    - faster-whisper (pip install faster-whisper) OR whisper (pip install openai-whisper)
+    - torch + torchaudio for --detector vad (Silero VAD via torch.hub)
+    - Optional: numpy + soundfile — decode legacy wav chunks once in Phase 1 and
+      concat them without ffmpeg
     - AssemblyAI API key (ASSEMBLYAI_API_KEY env var) OR Gemini API key (GEMINI_API_KEY)
+    - Optional: CLAWHARK_WEBHOOK — URL AssemblyAI notifies when a transcript completes
 """
 
 import argparse
-import glob
+import calendar
+import itertools
 import json
 import os
+import queue
+import re
 import subprocess
 import sys
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 def get_recordings_dir():
@@ -35,36 +45,200 @@ def get_recordings_dir():
 def get_transcripts_dir():
     return os.environ.get("CLAWHARK_TRANSCRIPTS", os.path.expanduser("~/.clawhark/transcripts"))
 
-def phase1_detect_speech(date_dir, chunks):
-    """Use whisper to detect which chunks have actual speech."""
-    print(f"\n📝 Phase 1: Speech detection ({len(chunks)} chunks)")
+def _decode(chunk):
+    """Decode a legacy wav chunk to 16kHz mono int16 PCM, or None if soundfile can't (e.g. m4a)."""
+    try:
+        import soundfile
+    except ImportError:
+        return None
+    try:
+        data, rate = soundfile.read(str(chunk), dtype="int16")
+    except RuntimeError:
+        return None
+    if rate != 16000 or data.ndim != 1:
+        return None
+    return data
+
+def _to_float(audio):
+    """int16 PCM → float32 in [-1, 1), the format whisper and Silero VAD expect."""
+    return audio.astype("float32") / 32768
+
+# Chunks quieter than this (RMS, dB relative to full scale) are treated as dead silence
+SILENCE_DBFS = -50
+
+def _likely_silent(audio):
+    """True if decoded PCM is below SILENCE_DBFS. Undecoded chunks (None) are never skipped."""
+    if audio is None:
+        return False
+    if audio.size == 0:
+        return True
+    import numpy as np
+    rms = np.sqrt(np.mean(np.square(audio, dtype=np.float64))) / 32768
+    return rms < 10 ** (SILENCE_DBFS / 20)
+
+_whisper = None
+_whisper_batch_size = 16
+
+def _get_whisper():
+    """Load the faster-whisper tiny model once (on GPU if CUDA is available and works).
+
+    Returns None if faster-whisper isn't installed.
+    """
+    global _whisper, _whisper_batch_size
+    if _whisper is None:
+        try:
+            import ctranslate2
+            from faster_whisper import BatchedInferencePipeline, WhisperModel
+        except ImportError:
+            return None
+        model = None
+        if ctranslate2.get_cuda_device_count() > 0:
+            try:
+                model = WhisperModel("tiny", device="cuda", compute_type="int8_float16")
+                # A visible GPU without a working CUDA/cuDNN runtime only fails on first
+                # use, so test-run it once rather than failing (and keeping) every chunk
+                import numpy as np
+                segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="en")
+                list(segments)
+                _whisper_batch_size = 32
+            except Exception as e:
+                print(f"  ⚠️  CUDA whisper unavailable ({e}), using CPU")
+                model = None
+        if model is None:
+            model = WhisperModel("tiny", device="cpu", compute_type="int8")
+        _whisper = BatchedInferencePipeline(model=model)
+    return _whisper
+
+def _transcribe_one(pipeline, chunk, audio=None):
+    """Transcribe one chunk in-process with the shared faster-whisper pipeline.
+
+    Returns None if this chunk fails (corrupt file, CUDA/cuDNN error), so it is
+    kept like the CLI fallback does instead of aborting the whole run.
+    """
+    source = _to_float(audio) if audio is not None else str(chunk)
+    try:
+        segments, _ = pipeline.transcribe(source, batch_size=_whisper_batch_size, vad_filter=True, language="en")
+        return " ".join(segment.text.strip() for segment in segments).strip()
+    except Exception as e:
+        print(f"  ⚠️  {chunk.name}: whisper failed ({e}), keeping chunk")
+        return None
+
+_vad = None
+
+def _get_vad():
+    """Load Silero VAD once. Returns (model, utils) from torch.hub."""
+    global _vad
+    if _vad is None:
+        import torch
+        _vad = torch.hub.load("snakers4/silero-vad", "silero_vad")
+    return _vad
+
+def _voiced_seconds(chunk, audio=None):
+    """Total seconds of speech Silero VAD finds in a chunk."""
+    import torch
+    model, (get_speech_timestamps, _, read_audio, *_) = _get_vad()
+    if audio is None:
+        audio = read_audio(str(chunk), sampling_rate=16000)
+    else:
+        audio = torch.from_numpy(_to_float(audio))
+    timestamps = get_speech_timestamps(audio, model, threshold=0.5, sampling_rate=16000)
+    return sum(ts["end"] - ts["start"] for ts in timestamps) / 16000
+
+# Whisper CLI scratch space; tmpfs when available so the txt roundtrip stays in RAM
+_WHISPER_TMP = Path("/dev/shm" if os.path.isdir("/dev/shm") else "/tmp") / "clawhark_whisper"
+
+def _detect_one(chunk):
+    """Run whisper tiny on one chunk. Returns its text, or None if whisper is unavailable."""
+    # Per-process output dir so concurrent workers never collide on output filenames
+    output_dir = _WHISPER_TMP / str(os.getpid())
+    try:
+        subprocess.run(
+            ["whisper", str(chunk), "--model", "tiny", "--language", "en",
+             "--output_format", "txt", "--output_dir", str(output_dir)],
+            capture_output=True, text=True, timeout=30
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        # If whisper not available, include all chunks
+        return None
+
+    txt_out = output_dir / f"{chunk.stem}.txt"
+    try:
+        text = txt_out.read_text()
+    except FileNotFoundError:
+        return ""
+    txt_out.unlink()
+    return " ".join(text.split())  # txt output is one line per segment
+
+def _audible(chunks):
+    """Yield (chunk, pcm) for chunks that pass the energy gate, decoding one at a time.
+
+    Dead-silent chunks are skipped before any model runs. Only the current
+    chunk's PCM is held; pcm is None for chunks soundfile can't decode.
+    """
+    for chunk in chunks:
+        audio = _decode(chunk)
+        if _likely_silent(audio):
+            print(f"  ⏭️  {chunk.name}: silent (< {SILENCE_DBFS} dBFS)")
+        else:
+            yield chunk, audio
+
+def phase1_detect_speech(date_dir, chunks, detector="whisper"):
+    """Use whisper (or Silero VAD) to detect which chunks have actual speech.
+
+    Returns (chunk, text) pairs; text is the whisper transcription, or None
+    when only VAD ran or whisper isn't available. Wav chunks are decoded once
+    and the same int16 PCM feeds the energy gate and the detector.
+    """
+    print(f"\n📝 Phase 1: Speech detection ({len(chunks)} chunks, {detector})")
     speech_chunks = []
 
-    for chunk in chunks:
-        # Quick check with whisper tiny model
-        try:
-            result = subprocess.run(
-                ["whisper", str(chunk), "--model", "tiny", "--language", "en",
-                 "--output_format", "json", "--output_dir", "/tmp/clawhark_whisper"],
-                capture_output=True, text=True, timeout=30
-            )
-            json_out = Path(f"/tmp/clawhark_whisper/{chunk.stem}.json")
-            if json_out.exists():
-                data = json.loads(json_out.read_text())
-                text = data.get("text", "").strip()
-                if len(text) > 10:  # More than just noise
-                    speech_chunks.append(chunk)
-                    print(f"  ✅ {chunk.name}: {text[:60]}...")
-                else:
-                    print(f"  ⏭️  {chunk.name}: silent/noise")
-                json_out.unlink()
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            # If whisper not available, include all chunks
-            speech_chunks.append(chunk)
+    if detector == "vad":
+        for chunk, audio in _audible(chunks):
+            voiced = _voiced_seconds(chunk, audio)
+            if voiced > 1:
+                speech_chunks.append((chunk, None))
+                print(f"  ✅ {chunk.name}: {voiced:.0f}s of speech")
+            else:
+                print(f"  ⏭️  {chunk.name}: silent/noise")
+    else:
+        whisper = _get_whisper()
+        if whisper is not None:
+            # Model is loaded once and reused for every chunk
+            results = [(chunk, _transcribe_one(whisper, chunk, audio))
+                       for chunk, audio in _audible(chunks)]
+        else:
+            # The CLI decodes on its own, so only the gate's verdict is kept here. Each
+            # whisper CLI call is an independent model load + decode, so run several at once
+            candidates = [chunk for chunk, _ in _audible(chunks)]
+            workers = max(1, (os.cpu_count() or 2) // 2)
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                results = list(zip(candidates, ex.map(_detect_one, candidates)))
+
+        for chunk, text in results:
+            if text is None:
+                speech_chunks.append((chunk, None))
+            elif len(text) > 10:  # More than just noise
+                speech_chunks.append((chunk, text))
+                print(f"  ✅ {chunk.name}: {text[:60]}...")
+            else:
+                print(f"  ⏭️  {chunk.name}: silent/noise")
 
     print(f"  {len(speech_chunks)}/{len(chunks)} chunks have speech")
     return speech_chunks
 
+# Timestamp in chunk filenames: chunk_YYYY-MM-DD_HH-MM-SS.wav
+_CHUNK_TIME = re.compile(r"chunk_(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})")
+
+def _chunk_time(chunk):
+    """Seconds since epoch from a chunk's filename, or None if it doesn't match."""
+    match = _CHUNK_TIME.search(chunk.stem)
+    if not match:
+        return None
+    try:
+        return calendar.timegm(tuple(int(g) for g in match.groups()) + (0, 0, 0))
+    except ValueError:  # Out-of-range fields, e.g. month 13 or 00
+        return None
+
 def phase2_segment(chunks):
     """Group chunks into conversations based on time gaps."""
     print(f"\n🔗 Phase 2: Segmentation")
@@ -73,17 +247,12 @@ def phase2_segment(chunks):
 
     conversations = []
     current = [chunks[0]]
+    times = [_chunk_time(chunk) for chunk in chunks]
 
     for i in range(1, len(chunks)):
-        # Parse timestamps from filenames: chunk_YYYY-MM-DD_HH-MM-SS.wav
-        prev_name = chunks[i-1].stem
-        curr_name = chunks[i].stem
-
-        try:
-            prev_time = datetime.strptime(prev_name.split("chunk_")[1], "%Y-%m-%d_%H-%M-%S")
-            curr_time = datetime.strptime(curr_name.split("chunk_")[1], "%Y-%m-%d_%H-%M-%S")
-            gap = (curr_time - prev_time).total_seconds()
-        except (ValueError, IndexError):
+        if times[i-1] is not None and times[i] is not None:
+            gap = times[i] - times[i-1]
+        else:
             gap = 300  # Default 5min gap
 
         if gap > 600:  # >10 min gap = new conversation
@@ -97,93 +266,240 @@ def phase2_segment(chunks):
     print(f"  Found {len(conversations)} conversation(s)")
     return conversations
 
-def phase3_concat(conversations, output_dir):
-    """Concatenate chunks in each conversation into single audio files."""
+def _concat_wav(conv, output):
+    """Stream 16kHz mono wav chunks into one PCM_16 wav, block by block.
+
+    Returns False without writing if soundfile is missing or any chunk isn't
+    such a wav (e.g. the watch's m4a), so the caller falls back to ffmpeg.
+    """
+    try:
+        import soundfile
+    except ImportError:
+        return False
+    try:
+        for chunk in conv:
+            info = soundfile.info(str(chunk))
+            if info.format != "WAV" or info.samplerate != 16000 or info.channels != 1:
+                return False
+    except RuntimeError:
+        return False
+
+    with soundfile.SoundFile(str(output), "w", 16000, 1, subtype="PCM_16") as out:
+        for chunk in conv:
+            for block in soundfile.blocks(str(chunk), blocksize=1 << 16, dtype="int16"):
+                out.write(block)
+    return True
+
+def _concat_one(i, conv, output_dir):
+    """Concatenate one conversation's chunks. Single chunks are used as-is.
+
+    Returns None if ffmpeg fails, so a missing or stale file is never diarized.
+    """
+    if len(conv) == 1:
+        return conv[0]
+
+    output = output_dir / f"conversation_{i+1}.wav"
+
+    # Legacy wav days: stream the PCM straight through and skip ffmpeg
+    if _concat_wav(conv, output):
+        print(f"  Merged {len(conv)} chunks → {output.name}")
+        return output
+
+    abs_paths = [str(chunk.absolute()) for chunk in conv]
+    # Feed the concat list over stdin instead of a temp file on disk
+    filelist = "".join(f"file '{path}'\n" for path in abs_paths)
+
+    result = subprocess.run([
+        "ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+        "-thread_queue_size", "1024",
+        "-protocol_whitelist", "file,pipe",
+        "-i", "pipe:0", "-c", "copy", str(output)
+    ], input=filelist.encode(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+
+    if result.returncode != 0:
+        # Don't leave a partial file, or keep one from an earlier run, in concat/
+        output.unlink(missing_ok=True)
+        error = result.stderr.decode(errors="replace").strip()
+        print(f"  ❌ ffmpeg failed ({result.returncode}) merging {output.name}: {error[:200]}")
+        return None
+
+    print(f"  Merged {len(conv)} chunks → {output.name}")
+    return output
+
+def phase3_concat(conversations, output_dir, q=None):
+    """Concatenate chunks in each conversation into single audio files.
+
+    If q is given, each (index, output) is put on it as soon as that
+    conversation is ready, so Phase 4 can start before Phase 3 finishes.
+    If any conversation fails to merge, exits non-zero once the rest are done,
+    so no partial transcript is written and the date stays pending for retry.
+    """
     print(f"\n🔊 Phase 3: Concatenation")
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-    outputs = []
-
-    for i, conv in enumerate(conversations):
-        if len(conv) == 1:
-            outputs.append(conv[0])
-            continue
-
-        output = output_dir / f"conversation_{i+1}.wav"
-        filelist = output_dir / f"filelist_{i+1}.txt"
-
-        with open(filelist, "w") as f:
-            for chunk in conv:
-                f.write(f"file '{chunk.absolute()}'\n")
-
-        subprocess.run([
-            "ffmpeg", "-y", "-f", "concat", "-safe", "0",
-            "-i", str(filelist), "-c", "copy", str(output)
-        ], capture_output=True)
-
-        filelist.unlink()
-        print(f"  Merged {len(conv)} chunks → {output.name}")
-        outputs.append(output)
-
-    return outputs
-
-def phase4_diarize(audio_files, transcript_path, provider="assemblyai"):
-    """Speaker-diarized transcription."""
+    outputs = {}
+
+    # Conversations are independent ffmpeg -c copy jobs, so run them concurrently
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as ex:
+        futures = {ex.submit(_concat_one, i, conv, output_dir): i
+                   for i, conv in enumerate(conversations)}
+        for future in as_completed(futures):
+            i = futures[future]
+            outputs[i] = future.result()
+            if q is not None and outputs[i] is not None:
+                q.put((i, outputs[i]))
+
+    failed = [i + 1 for i in sorted(outputs) if outputs[i] is None]
+    if failed:
+        sys.exit(f"\n❌ Concat failed for conversation(s) {', '.join(map(str, failed))}; "
+                 f"no transcript written")
+
+    return [outputs[i] for i in range(len(conversations))]
+
+def phase4_diarize(audio_files, transcript_path, provider="assemblyai", phase1_text=None):
+    """Speaker-diarized transcription.
+
+    phase1_text maps single, un-concatenated chunks to their Phase 1 whisper
+    text; those are written out directly instead of being sent to the provider.
+    """
     print(f"\n🎙️ Phase 4: Diarization ({provider})")
-
+    all_text = _diarize_all(enumerate(audio_files), provider, phase1_text)
+    return _write_transcript(all_text, transcript_path)
+
+def _diarize_all(audio_files, provider, phase1_text=None):
+    """Diarize (index, path) pairs as they arrive. Returns texts in index order."""
+    # Each file is an independent upload + remote job, so submit it the moment it
+    # arrives (capped to stay clear of provider rate limits)
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        futures = {i: ex.submit(_diarize_one, audio, provider, phase1_text)
+                   for i, audio in audio_files}
+    return [futures[i].result() for i in sorted(futures)]
+
+def _write_transcript(all_text, transcript_path):
+    """Join per-conversation texts and write the diarized transcript."""
     transcript_path = Path(transcript_path)
     transcript_path.parent.mkdir(parents=True, exist_ok=True)
 
-    all_text = []
-
-    for audio in audio_files:
-        print(f"  Transcribing: {audio.name}")
-
-        if provider == "assemblyai":
-            text = _diarize_assemblyai(audio)
-        elif provider == "gemini":
-            text = _diarize_gemini(audio)
-        else:
-            text = f"Unknown provider: {provider}"
-
-        all_text.append(text)
-
     full_transcript = "\n\n---\n\n".join(all_text)
     transcript_path.write_text(full_transcript)
     print(f"\n✅ Transcript saved: {transcript_path}")
     return transcript_path
 
+# End of Phase 3 output on the Phase 3 → 4 queue
+_DONE = object()
+
+# Set on failure or Ctrl-C so in-flight AssemblyAI polls return instead of running to completion
+_cancelled = threading.Event()
+
+def _drain(q):
+    """Yield items from a queue until the _DONE sentinel."""
+    while (item := q.get()) is not _DONE:
+        yield item
+
+def concat_and_diarize(conversations, concat_dir, transcript_path, provider="assemblyai",
+                       phase1_text=None):
+    """Phases 3 + 4 overlapped: uploads start while later conversations are still merging.
+
+    Phase 4 runs in a background thread; its errors are re-raised here, and the
+    transcript is only written once both phases have succeeded.
+    """
+    q = queue.Queue()
+    outcome = {}
+
+    def consume():
+        try:
+            items = _drain(q)
+            # Wait for Phase 3's first output so the Phase 4 header follows Phase 3's
+            first = next(items, None)
+            if first is None:
+                outcome["texts"] = []
+                return
+            print(f"\n🎙️ Phase 4: Diarization ({provider})")
+            outcome["texts"] = _diarize_all(itertools.chain([first], items), provider, phase1_text)
+        except BaseException as e:
+            outcome["error"] = e
+
+    # Daemon, so Ctrl-C or a Phase 3 failure doesn't wait on it at exit
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    try:
+        try:
+            phase3_concat(conversations, concat_dir, q)
+        finally:
+            q.put(_DONE)
+        consumer.join()
+    except BaseException:
+        _cancelled.set()
+        raise
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return _write_transcript(outcome["texts"], transcript_path)
+
+def _iter_file(path, block_size=5 * 1024 * 1024):
+    """Yield a file in fixed-size blocks so uploads stream with constant memory."""
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            yield block
+
+def _diarize_one(audio, provider, phase1_text=None):
+    """Diarize a single audio file with the chosen provider."""
+    if phase1_text and phase1_text.get(audio):
+        print(f"  Reusing Phase 1 text: {audio.name}")
+        return f"**Speaker ?** (0s): {phase1_text[audio]}"
+
+    print(f"  Transcribing: {audio.name}")
+    if provider == "assemblyai":
+        return _diarize_assemblyai(audio)
+    elif provider == "gemini":
+        return _diarize_gemini(audio)
+    return f"Unknown provider: {provider}"
+
+# requests.Session isn't documented as thread-safe, so each Phase 4 worker gets its own
+_aai_local = threading.local()
+
+def _get_aai_session(api_key):
+    """Per-thread keep-alive session so upload, create and every poll reuse one connection."""
+    session = getattr(_aai_local, "session", None)
+    if session is None:
+        import requests
+        session = requests.Session()
+        session.headers.update({"authorization": api_key})
+        _aai_local.session = session
+    return session
+
 def _diarize_assemblyai(audio_path):
     """Transcribe with AssemblyAI Universal-3 + speaker diarization."""
-    import requests
-
     api_key = os.environ.get("ASSEMBLYAI_API_KEY")
     if not api_key:
         return "Error: ASSEMBLYAI_API_KEY not set"
 
-    headers = {"authorization": api_key}
+    session = _get_aai_session(api_key)
 
-    # Upload
-    with open(audio_path, "rb") as f:
-        upload = requests.post("https://api.assemblyai.com/v2/upload",
-                             headers=headers, data=f)
+    # Upload (streamed in blocks, never the whole file in memory)
+    upload = session.post("https://api.assemblyai.com/v2/upload",
+                          data=_iter_file(audio_path))
     upload_url = upload.json()["upload_url"]
 
     # Transcribe with diarization
-    resp = requests.post("https://api.assemblyai.com/v2/transcript",
-                        headers=headers,
-                        json={"audio_url": upload_url, "speaker_labels": True})
+    body = {"audio_url": upload_url, "speaker_labels": True}
+    webhook = os.environ.get("CLAWHARK_WEBHOOK")
+    if webhook:
+        body["webhook_url"] = webhook
+    resp = session.post("https://api.assemblyai.com/v2/transcript", json=body)
     transcript_id = resp.json()["id"]
 
-    # Poll
+    # Poll with exponential backoff (2s → 4s → 8s …, capped at 30s)
+    delay = 2
     while True:
-        result = requests.get(f"https://api.assemblyai.com/v2/transcript/{transcript_id}",
-                            headers=headers).json()
+        result = session.get(f"https://api.assemblyai.com/v2/transcript/{transcript_id}").json()
         if result["status"] == "completed":
             break
         elif result["status"] == "error":
             return f"Error: {result.get('error', 'unknown')}"
-        import time; time.sleep(3)
+        if _cancelled.wait(delay):
+            return "Error: cancelled"
+        delay = min(30, delay * 2)
 
     # Format with speakers
     lines = []
@@ -195,26 +511,51 @@ def _diarize_assemblyai(audio_path):
 
     return "\n\n".join(lines) if lines else result.get("text", "No text")
 
+# Single-chunk conversations are passed through as-is, so they may be m4a
+_MIME_TYPES = {".wav": "audio/wav", ".m4a": "audio/mp4"}
+
 def _diarize_gemini(audio_path):
     """Transcribe with Gemini multimodal."""
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         return "Error: GEMINI_API_KEY not set"
 
-    import base64, requests
+    import requests
 
-    with open(audio_path, "rb") as f:
-        audio_b64 = base64.b64encode(f.read()).decode()
+    mime_type = _MIME_TYPES.get(Path(audio_path).suffix.lower(), "audio/wav")
 
-    resp = requests.post(
-        f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}",
-        json={
-            "contents": [{"parts": [
-                {"inlineData": {"mimeType": "audio/wav", "data": audio_b64}},
-                {"text": "Transcribe this audio with speaker diarization. Format as:\n**Speaker A** (timestamp): text\n\nIdentify different speakers and label them consistently."}
-            ]}]
-        }
+    # Upload via the Files API (streamed) and reference it by URI, instead of
+    # inlining the whole file as base64
+    upload_resp = requests.post(
+        f"https://generativelanguage.googleapis.com/upload/v1beta/files?key={api_key}",
+        headers={"X-Goog-Upload-Protocol": "raw", "Content-Type": mime_type},
+        data=_iter_file(audio_path)
     )
+    # Error pages (413/5xx) aren't JSON, so check the status before parsing
+    if upload_resp.status_code != 200:
+        return f"Error: upload failed ({upload_resp.status_code}): {upload_resp.text[:200]}"
+    upload = upload_resp.json()
+    if "file" not in upload:
+        return f"Error: {json.dumps(upload)[:200]}"
+    uploaded = upload["file"]
+
+    try:
+        resp = requests.post(
+            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}",
+            json={
+                "contents": [{"parts": [
+                    {"fileData": {"mimeType": mime_type, "fileUri": uploaded["uri"]}},
+                    {"text": "Transcribe this audio with speaker diarization. Format as:\n**Speaker A** (timestamp): text\n\nIdentify different speakers and label them consistently."}
+                ]}]
+            }
+        )
+    finally:
+        # Don't leave recordings sitting in the Files API until they expire. Best effort:
+        # a failed cleanup must not replace the transcription result or error.
+        try:
+            requests.delete(f"https://generativelanguage.googleapis.com/v1beta/{uploaded['name']}?key={api_key}")
+        except requests.RequestException as e:
+            print(f"  ⚠️  Could not delete {uploaded['name']} from Gemini Files API: {e}")
 
     result = resp.json()
     try:
@@ -227,6 +568,10 @@ def main():
     parser.add_argument("date", help="Date to transcribe (YYYY-MM-DD)")
     parser.add_argument("--provider", default="assemblyai", choices=["assemblyai", "gemini"],
                        help="Transcription provider (default: assemblyai)")
+    parser.add_argument("--detector", default="whisper", choices=["whisper", "vad"],
+                       help="Phase 1 speech detector: whisper tiny or Silero VAD (default: whisper)")
+    parser.add_argument("--skip-single-diarization", action="store_true",
+                       help="Reuse Phase 1 whisper text for single-chunk conversations instead of diarizing them")
     parser.add_argument("--recordings", default=None, help="Recordings directory")
     parser.add_argument("--transcripts", default=None, help="Transcripts directory")
     args = parser.parse_args()
@@ -234,12 +579,18 @@ def main():
     recordings_dir = Path(args.recordings or get_recordings_dir())
     transcripts_dir = Path(args.transcripts or get_transcripts_dir())
 
-    date_dir = recordings_dir / args.date
+    # Resolve once so every chunk path below is already absolute
+    date_dir = (recordings_dir / args.date).resolve()
     if not date_dir.exists():
         print(f"No recordings found for {args.date} in {recordings_dir}")
         sys.exit(1)
 
-    chunks = sorted(date_dir.glob("chunk_*.wav")) + sorted(date_dir.glob("chunk_*.m4a"))
+    # One directory pass; sorting by name keeps mixed wav/m4a days in time order
+    with os.scandir(date_dir) as it:
+        chunks = sorted((Path(e.path) for e in it
+                         if e.is_file() and e.name.startswith("chunk_")
+                         and e.name.endswith((".wav", ".m4a"))),
+                        key=lambda p: p.name)
     if not chunks:
         print(f"No audio chunks found in {date_dir}")
         sys.exit(1)
@@ -250,21 +601,20 @@ def main():
     print(f"   Provider: {args.provider}")
 
     # Phase 1: Speech detection
-    speech_chunks = phase1_detect_speech(date_dir, chunks)
+    speech_chunks = phase1_detect_speech(date_dir, chunks, args.detector)
     if not speech_chunks:
         print("\nNo speech detected in any chunks.")
         sys.exit(0)
 
     # Phase 2: Segment into conversations
-    conversations = phase2_segment(speech_chunks)
+    phase1_text = dict(speech_chunks)
+    conversations = phase2_segment(list(phase1_text))
 
-    # Phase 3: Concatenate
+    # Phase 3 + 4: Concatenate, diarizing each conversation as soon as it's merged
     concat_dir = date_dir / "concat"
-    audio_files = phase3_concat(conversations, concat_dir)
-
-    # Phase 4: Diarize
     transcript_path = transcripts_dir / f"{args.date}-diarized.md"
-    phase4_diarize(audio_files, transcript_path, args.provider)
+    concat_and_diarize(conversations, concat_dir, transcript_path, args.provider,
+                       phase1_text if args.skip_single_diarization else None)
 
 if __name__ == "__main__":
     main()